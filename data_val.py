@@ -1,12 +1,183 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _numeric_mismatch_mask(A, B):
+        """Elementwise A != B with NaN == NaN as a match, fused in one parallel pass"""
+        n, k = A.shape
+        out = np.empty((n, k), dtype=np.bool_)
+        for j in prange(k):
+            for i in range(n):
+                a = A[i, j]
+                b = B[i, j]
+                out[i, j] = a != b and not (np.isnan(a) and np.isnan(b))
+        return out
+
+def read_input_csv(path, dtype=None):
+    """
+    Load an input CSV, using Polars' streaming reader for UTF-8 files when
+    it is installed and pandas' pyarrow engine otherwise. Polars cannot
+    decode latin1, so files that are not valid UTF-8 always go through
+    pandas, which honors encoding='latin1'. Either way the caller gets a
+    pandas frame with Arrow-backed columns, so the comparison pipeline
+    downstream is unchanged.
+    """
+    if pl is not None:
+        try:
+            df = (pl.scan_csv(path, encoding='utf8')
+                    .collect(engine='streaming')
+                    .to_pandas(use_pyarrow_extension_array=True))
+        except pl.exceptions.ComputeError:
+            # Not valid UTF-8 (e.g. latin1 input); fall through to pandas
+            pass
+        else:
+            for col, dt in (dtype or {}).items():
+                if col in df.columns:
+                    df[col] = df[col].astype(dt)
+            return df
+    return pd.read_csv(path, encoding='latin1', engine='pyarrow',
+                       dtype_backend='pyarrow', dtype=dtype)
+
+def coerce_integer_floats(df):
+    """
+    Convert float columns that only contain whole numbers to Int64 (nullable
+    integer type). The check runs on the raw ndarray in a single pass, with
+    a small sample probed first so clearly fractional columns bail out
+    before scanning every value
+    """
+    for col in df.select_dtypes(include=['float']).columns:
+        arr = df[col].to_numpy(dtype='float64', na_value=np.nan)
+        valid = arr[~np.isnan(arr)]
+        if np.any(valid[:1024] % 1) or np.any(valid % 1):
+            continue
+        df[col] = pd.array(arr, dtype='Int64')
+    return df
+
+def validate_tables(old_table, new_table, id_column):
+    """
+    Validate a new table against an old one: report records missing from
+    either side, and field-level mismatches for records present in both
+    """
+    validation_report = {'mismatched_records': [], 'field_mismatches': {}}
+
+    # Records missing from one of the tables come straight from isin masks,
+    # so no outer join result has to be built and sliced
+    lo = (old_table.loc[~old_table[id_column].isin(new_table[id_column]), [id_column]]
+                   .assign(status='Missing in new table'))
+    ro = (new_table.loc[~new_table[id_column].isin(old_table[id_column]), [id_column]]
+                   .assign(status='Missing in old table'))
+    validation_report['mismatched_records'] = (
+        pd.concat([lo, ro]).rename(columns={id_column: 'id'}).to_dict('records'))
+
+    # Field mismatches only involve ids present in both tables, so the
+    # merge can be the cheaper inner join; validate raises instead of
+    # letting duplicate ids silently bloat the result. Columns are compared
+    # on the underlying arrays (NaN == NaN counts as a match)
+    matching_records = old_table.merge(new_table, on=id_column, how='inner',
+                                       suffixes=('_old', '_new'), validate='1:1')
+    ids = matching_records[id_column].to_numpy()
+    # Resolve the suffixed column pairs once, up front, so the compare loop
+    # does no f-string building or frame lookups
+    pairs = [(col, matching_records[f"{col}_old"], matching_records[f"{col}_new"])
+             for col in old_table.columns if col != id_column]
+    # When every compared column is float, pack the pairs into two
+    # contiguous 2D float64 arrays and run the fused JIT kernel (SIMD plus
+    # one prange thread per column). Integer columns stay on the Series
+    # path: casting int64 to float64 would silently equate values that
+    # differ only beyond 2**53. The Series API also handles NA without the
+    # elementwise ambiguity of comparing object arrays that hold pd.NA
+    numeric = (njit is not None and pairs and all(
+        pd.api.types.is_float_dtype(s_old) and pd.api.types.is_float_dtype(s_new)
+        for _, s_old, s_new in pairs))
+    if numeric:
+        A = np.column_stack([s_old.to_numpy(dtype=np.float64, na_value=np.nan)
+                             for _, s_old, _ in pairs])
+        B = np.column_stack([s_new.to_numpy(dtype=np.float64, na_value=np.nan)
+                             for _, _, s_new in pairs])
+        mismatch = _numeric_mismatch_mask(A, B)
+        col_masks = [(col, mismatch[:, j], s_old, s_new)
+                     for j, (col, s_old, s_new) in enumerate(pairs)]
+    else:
+        col_masks = [(col,
+                      (s_old.ne(s_new).fillna(True)
+                       & ~(s_old.isna() & s_new.isna())).to_numpy(dtype=bool),
+                      s_old, s_new)
+                     for col, s_old, s_new in pairs]
+    # Keep the mismatches columnar — four parallel arrays — and only turn
+    # them into per-id dict records at the report boundary, instead of
+    # building one Python dict per mismatch inside the loop
+    ids_parts, field_parts, old_parts, new_parts = [], [], [], []
+    for col, mask, s_old, s_new in col_masks:
+        ids_parts.append(ids[mask])
+        field_parts.append(np.full(int(mask.sum()), col, dtype=object))
+        old_parts.append(s_old.to_numpy()[mask])
+        new_parts.append(s_new.to_numpy()[mask])
+    if ids_parts:
+        mismatch_table = pd.DataFrame({
+            'id': np.concatenate(ids_parts),
+            'field': np.concatenate(field_parts),
+            'old': np.concatenate(old_parts),
+            'new': np.concatenate(new_parts)
+        })
+        validation_report['field_mismatches'] = {
+            id_val: group[['field', 'old', 'new']].to_dict('records')
+            for id_val, group in mismatch_table.groupby('id', sort=False)
+        }
+
+    return validation_report
 
 def safe_sort(values):
-    """Safely sort a list of mixed types by converting all to strings"""
-    try:
-        return sorted(list(values), key=str)
-    except:
-        return list(values)  # Return unsorted if sorting fails
+    """Safely sort values: natively when the types are homogeneous, by string key otherwise"""
+    values = list(values)
+    if len({type(v) for v in values}) <= 1:
+        return sorted(values)
+    return sorted(values, key=str)
+
+def _diff_one_col(col, s1, s2, a, b):
+    """
+    Compare one common column: unique-value set difference on the full
+    columns, plus row-level differences on the merged column pair (a/b are
+    None for the id column, which has no row-level comparison)
+    """
+    # Hash-based set difference on the native values; only values that
+    # land in the report get stringified
+    u1 = pd.Index(s1.dropna().unique())
+    u2 = pd.Index(s2.dropna().unique())
+    only1 = u1.difference(u2)
+    only2 = u2.difference(u1)
+    value_diff = None
+    if len(only1) or len(only2):
+        value_diff = {
+            'df1_values': safe_sort(u1.astype(str)),
+            'df2_values': safe_sort(u2.astype(str)),
+            'only_in_df1': safe_sort(only1.astype(str)),
+            'only_in_df2': safe_sort(only2.astype(str))
+        }
+
+    diff_mask = None
+    if a is not None:
+        # Compare on the native dtypes; a missing value on either side is a
+        # difference unless both sides are missing
+        mask = a.ne(b).fillna(True) & ~(a.isna() & b.isna())
+        if mask.any():
+            diff_mask = mask.to_numpy(dtype=bool)
+
+    return value_diff, diff_mask
 
 def compare_dataframes(df1, df2, unique_id_col):
     """
@@ -32,57 +203,75 @@ def compare_dataframes(df1, df2, unique_id_col):
         'value_differences': {}
     }
     
-    # For common columns, compare unique values
     common_columns = columns_df1.intersection(columns_df2)
-    for col in common_columns:
-        # Convert to strings to handle mixed types
-        values_df1 = set(df1[col].astype(str).dropna().unique())
-        values_df2 = set(df2[col].astype(str).dropna().unique())
-        
-        if values_df1 != values_df2:
-            report['columns']['value_differences'][col] = {
-                'df1_values': safe_sort(values_df1),
-                'df2_values': safe_sort(values_df2),
-                'only_in_df1': safe_sort(values_df1 - values_df2),
-                'only_in_df2': safe_sort(values_df2 - values_df1)
-            }
-    
-    # Find records with differences
-    common_ids = set(df1[unique_id_col]).intersection(set(df2[unique_id_col]))
-    record_differences = []
-    
-    for id_val in common_ids:
-        row1 = df1[df1[unique_id_col] == id_val].iloc[0]
-        row2 = df2[df2[unique_id_col] == id_val].iloc[0]
-        
-        differences = {}
-        for col in common_columns:
-            val1 = str(row1[col])
-            val2 = str(row2[col])
-            if val1 != val2:
-                differences[col] = {'df1': val1, 'df2': val2}
-        
-        if differences:
-            for col, vals in differences.items():
-                record_differences.append({
-                    'Record ID': id_val,
-                    'Column': col,
-                    'DF1 Value': vals['df1'],
-                    'DF2 Value': vals['df2']
-                })
-    
-    report['record_differences'] = record_differences
-    return report, pd.DataFrame(record_differences)
+
+    # A single inner merge on the id column replaces the two boolean scans
+    # of the full frame per id, which made the old loop O(N*M)
+    m = df1.drop_duplicates(subset=unique_id_col).merge(
+        df2.drop_duplicates(subset=unique_id_col),
+        on=unique_id_col, suffixes=('_df1', '_df2'), how='inner', validate='1:1')
+
+    # Columns are independent, so fan the per-column comparison out over a
+    # thread pool; pandas releases the GIL inside the numpy/Arrow kernels
+    ordered_common = [col for col in df1.columns if col in common_columns]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        futures = {
+            col: ex.submit(
+                _diff_one_col, col, df1[col], df2[col],
+                m[f'{col}_df1'] if col != unique_id_col else None,
+                m[f'{col}_df2'] if col != unique_id_col else None)
+            for col in ordered_common
+        }
+        results = {col: future.result() for col, future in futures.items()}
+
+    masks = {}
+    for col in ordered_common:
+        value_diff, diff_mask = results[col]
+        if value_diff is not None:
+            report['columns']['value_differences'][col] = value_diff
+        if diff_mask is not None:
+            masks[col] = diff_mask
+
+    if masks:
+        # Stack wide value/mask frames into long form in one call instead
+        # of building and concatenating one mini-frame per column
+        idx = pd.Index(m[unique_id_col], name='Record ID')
+        # One Arrow-backed string conversion per column, not a Python str()
+        # per cell; the arrays stay Arrow chunked arrays through the stack
+        old_wide = pd.DataFrame({col: m[f'{col}_df1'].astype('string[pyarrow]').set_axis(idx)
+                                 for col in masks})
+        new_wide = pd.DataFrame({col: m[f'{col}_df2'].astype('string[pyarrow]').set_axis(idx)
+                                 for col in masks})
+        mask_wide = pd.DataFrame(masks, index=idx)
+        old_wide.columns.name = new_wide.columns.name = mask_wide.columns.name = 'Column'
+        stacked = pd.concat({'DF1 Value': old_wide.stack(),
+                             'DF2 Value': new_wide.stack(),
+                             '_diff': mask_wide.stack()}, axis=1)
+        differences_df = (stacked.loc[stacked['_diff']]
+                                 .drop(columns='_diff')
+                                 .reset_index()
+                                 [['Record ID', 'Column', 'DF1 Value', 'DF2 Value']])
+    else:
+        differences_df = pd.DataFrame(columns=['Record ID', 'Column', 'DF1 Value', 'DF2 Value'])
+
+    report['record_differences'] = differences_df.to_dict('records')
+    return report, differences_df
+
+def write_report_csv(df, path):
+    """Write a report frame through pyarrow's single-pass CSV writer"""
+    pa.csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
 
 def print_report(report):
     """Print the comparison report in a readable format and export to CSV files"""
+    os.makedirs('reports', exist_ok=True)
+
     print("\n=== RECORD COUNTS ===")
     print(f"DataFrame 1: {report['counts']['df1_total_records']} records ({report['counts']['df1_unique_ids']} unique IDs)")
     print(f"DataFrame 2: {report['counts']['df2_total_records']} records ({report['counts']['df2_unique_ids']} unique IDs)")
     
     # Export record counts to CSV
     counts_df = pd.DataFrame([report['counts']])
-    counts_df.to_csv('reports/record_counts.csv', index=False)
+    write_report_csv(counts_df, 'reports/record_counts.csv')
     print("\nRecord counts exported to 'record_counts.csv'")
     
     print("\n=== COLUMN DIFFERENCES ===")
@@ -96,7 +285,7 @@ def print_report(report):
         'only_in_df1': [', '.join(report['columns']['only_in_df1'])],
         'only_in_df2': [', '.join(report['columns']['only_in_df2'])]
     })
-    columns_df.to_csv('reports/column_differences.csv', index=False)
+    write_report_csv(columns_df, 'reports/column_differences.csv')
     print("Column differences exported to 'column_differences.csv'")
     
     if report['columns']['value_differences']:
@@ -115,33 +304,27 @@ def print_report(report):
                 'Values only in DataFrame 2': ', '.join(diff['only_in_df2'])
             })
         value_differences_df = pd.DataFrame(value_differences_list)
-        value_differences_df.to_csv('reports/value_differences.csv', index=False)
+        write_report_csv(value_differences_df, 'reports/value_differences.csv')
         print("Value differences exported to 'value_differences.csv'")
 
 # Example usage:
-try:
-    # Add low_memory=False to handle mixed types
-    df1 = pd.read_csv('prod_dec23.csv', encoding='latin1', low_memory=False,dtype={"InspectorDistrict": "Int64"})
-    df2 = pd.read_csv('test_dec23.csv', encoding='latin1', low_memory=False,dtype={"InspectorDistrict": "Int64"})
-
-    # Convert float columns that only contain integers to Int64 (nullable integer type)
-    for col in df1.select_dtypes(include=['float']).columns:
-        if df1[col].dropna().mod(1).eq(0).all():  # Check if all values are whole numbers
-            df1[col] = df1[col].astype("Int64")
-
-    for col in df2.select_dtypes(include=['float']).columns:
-        if df2[col].dropna().mod(1).eq(0).all():
-            df2[col] = df2[col].astype("Int64")
-
-except UnicodeDecodeError as e:
-    print(f"Error reading CSV files: {e}")
-    print("Try using a different encoding, such as 'ISO-8859-1' or 'utf-16'.")
-    exit()
-
-# Compare dataframes and print rzeport
-report, differences_df = compare_dataframes(df1, df2, 'RowID')  # Replace 'RowID' with your unique ID column name
-print_report(report)
-
-# Export record differences to a CSV file
-differences_df.to_csv('reports/record_differences.csv', index=False)
-print("\nRecord differences exported to 'record_differences.csv'")
+if __name__ == '__main__':
+    try:
+        df1 = read_input_csv('prod_dec23.csv', dtype={"InspectorDistrict": "Int64"})
+        df2 = read_input_csv('test_dec23.csv', dtype={"InspectorDistrict": "Int64"})
+
+        df1 = coerce_integer_floats(df1)
+        df2 = coerce_integer_floats(df2)
+
+    except UnicodeDecodeError as e:
+        print(f"Error reading CSV files: {e}")
+        print("Try using a different encoding, such as 'ISO-8859-1' or 'utf-16'.")
+        exit()
+
+    # Compare dataframes and print rzeport
+    report, differences_df = compare_dataframes(df1, df2, 'RowID')  # Replace 'RowID' with your unique ID column name
+    print_report(report)
+
+    # Export record differences to a CSV file
+    write_report_csv(differences_df, 'reports/record_differences.csv')
+    print("\nRecord differences exported to 'record_differences.csv'")